@@ -1,19 +1,23 @@
 """Main API."""
 
+import asyncio
+import os
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+
 import nltk
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.openapi.utils import get_openapi
+from fastapi.responses import ORJSONResponse
 from loguru import logger
 from phoenix.trace.langchain import LangChainInstrumentor
 
 from agent.routes import collection, delete, embeddings, rag, search
-from agent.utils.vdb import initialize_all_vector_dbs
+from agent.utils.semantic_cache import initialize_semantic_cache
+from agent.utils.vdb import initialize_all_vector_dbs, load_vec_db_conn
 
 LangChainInstrumentor().instrument()
-nltk.download("punkt")
-nltk.download("punkt_tab")
-initialize_all_vector_dbs()
 logger.info("Startup.")
 
 logger.info(
@@ -46,7 +50,31 @@ def my_schema() -> dict:
     return app.openapi_schema
 
 
-app = FastAPI(debug=True)
+def download_tokenizers() -> None:
+    """Download the NLTK tokenizers used for splitting the documents, if they are not available yet."""
+    for name in ("punkt", "punkt_tab"):
+        try:
+            nltk.data.find(f"tokenizers/{name}")
+        except LookupError:
+            nltk.download(name)
+
+
+async def initialize() -> None:
+    """Download the tokenizers and initialize the databases concurrently."""
+    # lru_cache does not lock its first call, so the shared client is created before the concurrent initializations
+    load_vec_db_conn()
+    await asyncio.gather(asyncio.to_thread(download_tokenizers), initialize_all_vector_dbs(), asyncio.to_thread(initialize_semantic_cache))
+    logger.info("Initialized the Vector Databases.")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:  # noqa: ARG001
+    """Initialize the tokenizers and databases before serving requests."""
+    await initialize()
+    yield
+
+
+app = FastAPI(debug=True, default_response_class=ORJSONResponse, lifespan=lifespan)
 app.openapi = my_schema
 
 load_dotenv(override=True)
@@ -65,10 +93,12 @@ def read_root() -> str:
     return "Welcome to the RAG Backend. Please navigate to /docs for the OpenAPI!"
 
 
-# initialize the databases
-
-
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    # initialize once before the workers are started, so their lifespans find the tokenizers and collections in place
+    asyncio.run(initialize())
+
+    # multiple workers require the app as import string, every worker runs its own lifespan
+    # the auto loop uses uvloop where it is installed and falls back to asyncio on windows
+    uvicorn.run("agent.api:app", host="0.0.0.0", port=8001, workers=os.cpu_count(), loop="auto", http="httptools", log_level="info")
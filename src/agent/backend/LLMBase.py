@@ -2,7 +2,7 @@
 
 from abc import ABC, abstractmethod
 
-from agent.data_model.request_data_model import LLMBackend, SearchParams
+from agent.data_model.request_data_model import SearchParams
 
 
 class LLMBase(ABC):
@@ -14,15 +14,23 @@ class LLMBase(ABC):
         self.collection_name = collection_name
 
     @abstractmethod
-    def embed_documents(self, directory: str, llm_backend: LLMBackend) -> None:
+    def embed_documents(self, directory: str, file_ending: str, content_hashes: dict[str, str] | None = None) -> None:
         """Embedd new docments in the Qdrant DB."""
 
+    @abstractmethod
+    def embed_query(self, query: str) -> list[float]:
+        """Embed a query with the embedding model of the vector database."""
+
+    @abstractmethod
+    def embed_queries(self, queries: list[str]) -> list[list[float]]:
+        """Embed multiple queries with the embedding model of the vector database."""
+
     @abstractmethod
     def create_collection(self, name: str) -> bool:
         """Create a new collection in the Vector Database."""
 
     @abstractmethod
-    def create_search_chain(self, search: SearchParams) -> list:
+    def create_search_chain(self, search: SearchParams, embedding: list[float] | None = None) -> list:
         """Searches the documents in the Qdrant DB with semantic search."""
 
     @abstractmethod
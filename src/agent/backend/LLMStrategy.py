@@ -1,12 +1,13 @@
 """The Strategy Pattern for the LLM Backend."""
 
+from functools import lru_cache
 from typing import ClassVar
 
 from agent.backend.LLMBase import LLMBase
 from agent.backend.services.cohere_service import CohereService
 from agent.backend.services.ollama_service import OllamaService
 from agent.backend.services.open_ai_service import OpenAIService
-from agent.data_model.request_data_model import LLMProvider, SearchParams
+from agent.data_model.request_data_model import LLMBackend, LLMProvider, SearchParams
 
 
 class LLMStrategyFactory:
@@ -29,13 +30,16 @@ class LLMStrategyFactory:
     }
 
     @staticmethod
+    @lru_cache(maxsize=128)
     def get_strategy(strategy_type: str, collection_name: str) -> LLMBase:
         """Get the correct strategy.
 
+        The strategies are cached per strategy type and collection, so the embedding
+        and vector database clients are only created once and reused between requests.
+
         Args:
         ----
             strategy_type (str): The strategy type.
-            token (str): The token for the strategy.
             collection_name (str): The collection name of the vector database.
 
         Raises:
@@ -65,13 +69,21 @@ class LLMContext:
         """Changes the strategy using the Factory."""
         self.llm = LLMStrategyFactory.get_strategy(strategy_type=strategy_type, collection_name=collection_name)
 
-    def search(self, search: SearchParams) -> list:
+    def search(self, search: SearchParams, embedding: list[float] | None = None) -> list:
         """Wrapper for the search."""
-        return self.llm.create_search_chain(search=search)
+        return self.llm.create_search_chain(search=search, embedding=embedding)
 
-    def embed_documents(self, directory: str, file_ending: str) -> None:
+    def embed_documents(self, directory: str, file_ending: str, content_hashes: dict[str, str] | None = None) -> None:
         """Wrapper for the Embedding of Documents."""
-        return self.llm.embed_documents(directory=directory, file_ending=file_ending)
+        return self.llm.embed_documents(directory=directory, file_ending=file_ending, content_hashes=content_hashes)
+
+    def embed_query(self, query: str) -> list[float]:
+        """Wrapper for the Embedding of a Query."""
+        return self.llm.embed_query(query)
+
+    def embed_queries(self, queries: list[str]) -> list[list[float]]:
+        """Wrapper for the Embedding of multiple Queries."""
+        return self.llm.embed_queries(queries)
 
     def create_collection(self, name: str) -> None:
         """Wrapper for creating a collection."""
@@ -80,3 +92,21 @@ class LLMContext:
     def summarize_text(self, text: str) -> str:
         """Wrapper for the summarization of text."""
         return self.llm.summarize_text(text)
+
+
+def get_service(llm_backend: LLMBackend) -> LLMContext:
+    """Get the LLM Context for the requested LLM backend.
+
+    Used as a FastAPI dependency, so the routes share one lookup in the cached strategies.
+    Creating a strategy connects to the vector database, so this is a plain function that FastAPI runs in its threadpool.
+
+    Args:
+    ----
+        llm_backend (LLMBackend): The requested LLM backend.
+
+    Returns:
+    -------
+        LLMContext: The context with the strategy for the backend.
+
+    """
+    return LLMContext(LLMStrategyFactory.get_strategy(strategy_type=llm_backend.llm_provider, collection_name=llm_backend.collection_name))
@@ -2,11 +2,13 @@
 
 import os
 from collections.abc import Sequence
+from functools import lru_cache
 from typing import Annotated, Literal, TypedDict
 
 from langchain_cohere import ChatCohere, CohereEmbeddings
 from langchain_community.chat_models.ollama import ChatOllama
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_core.language_models import LanguageModelLike
 from langchain_core.messages import (
     AIMessage,
@@ -24,21 +26,27 @@ from langchain_core.runnables import ConfigurableField, RunnableConfig, chain
 from langchain_openai import ChatOpenAI
 from langchain_qdrant import Qdrant
 from langgraph.graph import END, StateGraph, add_messages
-from qdrant_client import QdrantClient
 
 from agent.backend.prompts import COHERE_RESPONSE_TEMPLATE, REPHRASE_TEMPLATE, RESPONSE_TEMPLATE
 from agent.data_model.request_data_model import LLMProvider
 from agent.utils.utility import format_docs_for_citations
+from agent.utils.vdb import QUANTIZATION_SEARCH_PARAMS, load_vec_db_conn
 
 OPENAI_MODEL_KEY = "openai_gpt_3_5_turbo"
 COHERE_MODEL_KEY = "cohere_command"
 OLLAMA_MODEL_KEY = "ollama_llama8b3.1"
 
+# collection the rag retrievers search in and the number of documents they return
+RETRIEVER_COLLECTION = "cohere"
+RETRIEVER_K = 4
+
 
 class AgentState(TypedDict):
     """State of the Agent."""
 
     query: str
+    # embedding of the first message, if the caller already embedded it
+    embedding: list[float] | None
     documents: list[Document]
     messages: Annotated[list[BaseMessage], add_messages]
 
@@ -66,6 +74,20 @@ llm = gpt4o.configurable_alternatives(
 ).with_fallbacks([cohere_command, ollama_chat])
 
 
+@lru_cache(maxsize=1)
+def get_embedding() -> Embeddings:
+    """Get the Embedding Model of the retrievers.
+
+    The API key is read from the environment once per process, so the client is created only once and reused.
+
+    Returns
+    -------
+        Embeddings: Cohere Embeddings
+
+    """
+    return CohereEmbeddings(model="embed-multilingual-v3.0")
+
+
 def get_score_retriever() -> BaseRetriever:
     """Get the Retriever.
 
@@ -74,11 +96,11 @@ def get_score_retriever() -> BaseRetriever:
         BaseRetriever: _description_
 
     """
-    embedding = CohereEmbeddings(model="embed-multilingual-v3.0")
+    embedding = get_embedding()
 
-    qdrant_client = QdrantClient("http://localhost", port=6333, api_key=os.getenv("QDRANT_API_KEY"), prefer_grpc=False)
+    qdrant_client, _ = load_vec_db_conn()
 
-    vector_db = Qdrant(client=qdrant_client, collection_name="cohere", embeddings=embedding)
+    vector_db = Qdrant(client=qdrant_client, collection_name=RETRIEVER_COLLECTION, embeddings=embedding)
 
     @chain
     def retriever_with_score(query: str) -> list[Document]:
@@ -93,7 +115,7 @@ def get_score_retriever() -> BaseRetriever:
             list[Document]: List of Langchain Documents.
 
         """
-        docs, scores = zip(*vector_db.similarity_search_with_score(query), strict=False)
+        docs, scores = zip(*vector_db.similarity_search_with_score(query, search_params=QUANTIZATION_SEARCH_PARAMS), strict=False)
         for doc, score in zip(docs, scores, strict=False):
             doc.metadata["score"] = score
 
@@ -102,6 +124,21 @@ def get_score_retriever() -> BaseRetriever:
     return retriever_with_score
 
 
+def get_vector_db() -> Qdrant:
+    """Get the Vector Database of the retrievers.
+
+    Returns
+    -------
+        Qdrant: Qdrant with Cohere Embeddings
+
+    """
+    embedding = get_embedding()
+
+    qdrant_client, _ = load_vec_db_conn()
+
+    return Qdrant(client=qdrant_client, collection_name=RETRIEVER_COLLECTION, embeddings=embedding)
+
+
 def get_retriever() -> BaseRetriever:
     """Create a Vector Database retriever.
 
@@ -110,12 +147,7 @@ def get_retriever() -> BaseRetriever:
         BaseRetriever: Qdrant + Cohere Embeddings Retriever
 
     """
-    embedding = CohereEmbeddings(model="embed-multilingual-v3.0")
-
-    qdrant_client = QdrantClient("http://localhost", port=6333, api_key=os.getenv("QDRANT_API_KEY"), prefer_grpc=False)
-
-    vector_db = Qdrant(client=qdrant_client, collection_name="cohere", embeddings=embedding)
-    return vector_db.as_retriever(search_kwargs={"k": 4})
+    return get_vector_db().as_retriever(search_kwargs={"k": RETRIEVER_K, "search_params": QUANTIZATION_SEARCH_PARAMS})
 
 
 def retrieve_documents(state: AgentState) -> AgentState:
@@ -130,10 +162,13 @@ def retrieve_documents(state: AgentState) -> AgentState:
         AgentState: Modified Graph State.
 
     """
-    retriever = get_retriever()
     messages = convert_to_messages(state["messages"])
     query = messages[-1].content
-    relevant_documents = retriever.invoke(query)
+    if embedding := state.get("embedding"):
+        # the query was already embedded for the semantic cache
+        relevant_documents = get_vector_db().similarity_search_by_vector(embedding, k=RETRIEVER_K, search_params=QUANTIZATION_SEARCH_PARAMS)
+    else:
+        relevant_documents = get_retriever().invoke(query)
     return {"query": query, "documents": relevant_documents}
 
 
@@ -15,7 +15,7 @@ from agent.backend.LLMBase import LLMBase
 from agent.data_model.request_data_model import (
     SearchParams,
 )
-from agent.utils.vdb import generate_collection, init_vdb
+from agent.utils.vdb import add_texts_in_batches, generate_collection, hybrid_search_with_score, init_vdb
 
 load_dotenv()
 
@@ -37,15 +37,16 @@ class CohereService(LLMBase):
 
         embedding = CohereEmbeddings(model=self.cfg.cohere_embeddings.embedding_model_name)
 
-        self.vector_db = init_vdb(self.cfg, self.collection_name, embedding=embedding)
+        self.vector_db = init_vdb(self.collection_name, embedding=embedding)
 
-    def embed_documents(self, directory: str, file_ending: str = ".pdf") -> None:
+    def embed_documents(self, directory: str, file_ending: str = ".pdf", content_hashes: dict[str, str] | None = None) -> None:
         """Embeds the documents in the given directory.
 
         Args:
         ----
             directory (str): PDF Directory.
             file_ending (str): File ending of the documents.
+            content_hashes (dict[str, str] | None): Content hash of each file name, stored with the embedded chunks.
 
         """
         if file_ending == ".pdf":
@@ -60,7 +61,7 @@ class CohereService(LLMBase):
 
         docs = loader.load_and_split(splitter)
 
-        logger.info(f"Loaded {len(docs)} documents.")
+        logger.info("Loaded {} documents.", len(docs))
         text_list = [doc.page_content for doc in docs]
         metadata_list = [doc.metadata for doc in docs]
 
@@ -68,18 +69,41 @@ class CohereService(LLMBase):
             # only when there are / in the source
             if "/" in m["source"]:
                 m["source"] = m["source"].split("/")[-1]
+            if content_hashes and m["source"] in content_hashes:
+                m["content_hash"] = content_hashes[m["source"]]
 
-        self.vector_db.add_texts(texts=text_list, metadatas=metadata_list)
+        add_texts_in_batches(
+            self.vector_db,
+            texts=text_list,
+            metadatas=metadata_list,
+            batch_size=self.cfg.qdrant.embedding_batch_size,
+            max_workers=self.cfg.qdrant.embedding_max_workers,
+        )
 
         logger.info("SUCCESS: Texts embedded.")
 
+    def embed_query(self, query: str) -> list[float]:
+        """Embed a query with the embedding model of the vector database."""
+        return self.vector_db.embeddings.embed_query(query)
+
+    def embed_queries(self, queries: list[str]) -> list[list[float]]:
+        """Embed multiple queries in a single request to the embedding model."""
+        return self.vector_db.embeddings.embed(queries, input_type="search_query")
+
     def create_collection(self, name: str) -> bool:
         """Create a new collection in the Vector Database."""
         generate_collection(name, self.cfg.cohere_embeddings.size)
         return True
 
-    def create_search_chain(self, search: SearchParams) -> BaseRetriever:
-        """Searches the documents in the Qdrant DB with semantic search."""
+    def create_search_chain(self, search: SearchParams, embedding: list[float] | None = None) -> BaseRetriever:
+        """Searches the documents in the Qdrant DB with semantic search.
+
+        Args:
+        ----
+            search (SearchParams): The search parameters.
+            embedding (list[float] | None): Embedding of the query, if it was already embedded.
+
+        """
 
         @chain
         def retriever_with_score(query: str) -> list[Document]:
@@ -94,13 +118,11 @@ class CohereService(LLMBase):
                 list[Document]: List of Langchain Documents.
 
             """
-            docs, scores = zip(
-                *self.vector_db.similarity_search_with_score(query, k=search.k, filter=search.filter, score_threshold=search.score_threshold), strict=False
-            )
-            for doc, score in zip(docs, scores, strict=False):
+            results = hybrid_search_with_score(self.vector_db, query, search=search, embedding=embedding)
+            for doc, score in results:
                 doc.metadata["score"] = score
 
-            return docs
+            return [doc for doc, _ in results]
 
         return retriever_with_score
 
@@ -16,7 +16,7 @@ from ultra_simple_config import load_config
 from agent.backend.LLMBase import LLMBase
 from agent.data_model.request_data_model import RAGRequest, SearchParams
 from agent.utils.utility import load_prompt_template
-from agent.utils.vdb import generate_collection, init_vdb
+from agent.utils.vdb import add_texts_in_batches, generate_collection, init_vdb
 
 load_dotenv()
 
@@ -49,7 +49,7 @@ class OpenAIService(LLMBase):
         else:
             embedding = OpenAIEmbeddings(model=self.cfg.openai_embeddings.embedding_model_name)
 
-        self.vector_db = init_vdb(self.cfg, self.collection_name, embedding=embedding)
+        self.vector_db = init_vdb(self.collection_name, embedding=embedding)
 
     def create_collection(self, name: str) -> bool:
         """Create a new collection in the Vector Database.
@@ -60,16 +60,17 @@ class OpenAIService(LLMBase):
 
         """
         generate_collection(name, self.cfg.openai_embeddings.size)
-        logger.info(f"SUCCESS: Collection {name} created.")
+        logger.info("SUCCESS: Collection {} created.", name)
         return True
 
-    def embed_documents(self, directory: str, file_ending: str = ".pdf") -> None:
+    def embed_documents(self, directory: str, file_ending: str = ".pdf", content_hashes: dict[str, str] | None = None) -> None:
         """Embeds the documents in the given directory.
 
         Args:
         ----
             directory (str): PDF Directory.
             file_ending (str): File ending of the documents.
+            content_hashes (dict[str, str] | None): Content hash of each file name, stored with the embedded chunks.
 
         """
         if file_ending == ".pdf":
@@ -84,7 +85,7 @@ class OpenAIService(LLMBase):
 
         docs = loader.load_and_split(splitter)
 
-        logger.info(f"Loaded {len(docs)} documents.")
+        logger.info("Loaded {} documents.", len(docs))
         text_list = [doc.page_content for doc in docs]
         metadata_list = [doc.metadata for doc in docs]
 
@@ -92,11 +93,28 @@ class OpenAIService(LLMBase):
             # only when there are / in the source
             if "/" in m["source"]:
                 m["source"] = m["source"].split("/")[-1]
-
-        self.vector_db.add_texts(texts=text_list, metadatas=metadata_list)
+            if content_hashes and m["source"] in content_hashes:
+                m["content_hash"] = content_hashes[m["source"]]
+
+        add_texts_in_batches(
+            self.vector_db,
+            texts=text_list,
+            metadatas=metadata_list,
+            batch_size=self.cfg.qdrant.embedding_batch_size,
+            max_workers=self.cfg.qdrant.embedding_max_workers,
+        )
 
         logger.info("SUCCESS: Texts embedded.")
 
+    def embed_query(self, query: str) -> list[float]:
+        """Embed a query with the embedding model of the vector database."""
+        return self.vector_db.embeddings.embed_query(query)
+
+    def embed_queries(self, queries: list[str]) -> list[list[float]]:
+        """Embed multiple queries in a single request to the embedding model."""
+        # openai embeds queries and documents the same way
+        return self.vector_db.embeddings.embed_documents(queries)
+
     def summarize_text(self, text: str) -> str:
         """Summarizes the given text using the OpenAI API.
 
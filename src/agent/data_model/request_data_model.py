@@ -2,7 +2,7 @@
 
 from enum import Enum
 
-from fastapi import UploadFile
+from fastapi import Form, UploadFile
 from pydantic import BaseModel, Field
 
 
@@ -38,6 +38,15 @@ class LLMBackend(BaseModel):
     llm_provider: LLMProvider = Field(LLMProvider.COHERE, description="The LLM provider to use for embedding.")
     collection_name: str | None = Field("", description="The name of the Qdrant Collection.")
 
+    @classmethod
+    def as_form(
+        cls,
+        llm_provider: LLMProvider = Form(LLMProvider.COHERE, description="The LLM provider to use for embedding."),
+        collection_name: str | None = Form("", description="The name of the Qdrant Collection."),
+    ) -> "LLMBackend":
+        """Read the LLM Backend from form fields, for routes that receive multipart file uploads."""
+        return cls(llm_provider=llm_provider, collection_name=collection_name)
+
 
 class EmbeddTextFilesRequest(BaseModel):
     """The request for the Embedd Text Files endpoint."""
@@ -78,6 +87,18 @@ class EmbeddTextRequest(BaseModel):
     seperator: str = Field("###", title="seperator", description="The seperator to use between embedded texts.")
 
 
+class EmbeddTextBatchRequest(BaseModel):
+    """The request parameters for embedding multiple texts at once."""
+
+    texts: list[EmbeddTextRequest] = Field(..., title="Texts", description="The texts to embed.", min_length=1, max_length=64)
+
+
+class SearchBatchRequest(BaseModel):
+    """The request parameters for running multiple searches at once."""
+
+    searches: list[SearchParams] = Field(..., title="Searches", description="The searches to run.", min_length=1, max_length=64)
+
+
 class CustomPromptCompletion(BaseModel):
     """The Custom Prompt Completion Model."""
 
@@ -16,16 +16,27 @@ class SearchResponse(BaseModel):
     """The request parameters for explaining the output."""
 
     text: str = Field(..., title="Text", description="The text of the document.")
-    page: int = Field(..., title="Page", description="The page of the document.")
+    page: int | None = Field(None, title="Page", description="The page of the document, if it has pages.")
     source: str = Field(..., title="Source", description="The source of the document.")
     score: float = Field(..., title="Score", description="The score of the document.")
 
 
+class SearchBatchResponse(BaseModel):
+    """The Response for one search of the Search Batch endpoint."""
+
+    results: list[SearchResponse] = Field([], title="Results", description="The documents found for the search.")
+    latency_ms: float = Field(..., title="Latency", description="The time it took to run the search in milliseconds.")
+
+
 class EmbeddingResponse(BaseModel):
     """The Response for the Embedding endpoint."""
 
     status: Status = Field(Status.SUCCESS, title="Status", description="The status of the request.")
     files: list[str] = Field([], title="Files", description="The list of files that were embedded.")
+    duplicates: dict[str, str] = Field({}, title="Duplicates", description="Files with the same content as another file of the request, mapped to that file.")
+    replaced: dict[str, str] = Field(
+        {}, title="Replaced", description="Files whose content was already embedded, mapped to the previous file name that the embeddings are no longer found under."
+    )
 
 
 class QAResponse(BaseModel):
@@ -1,16 +1,18 @@
 """Routes for the collection management."""
 
+import asyncio
+
 from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 
-from agent.backend.LLMStrategy import LLMContext, LLMStrategyFactory
 from agent.data_model.request_data_model import LLMProvider
+from agent.utils.vdb import generate_collection, get_embeddings_size
 
 router = APIRouter()
 
 
 @router.post("/create/{llm_provider}/{collection_name}", tags=["collection"])
-def create_collection(llm_provider: LLMProvider, collection_name: str) -> JSONResponse:
+async def create_collection(llm_provider: LLMProvider, collection_name: str) -> JSONResponse:
     """Create a new collection.
 
     Args:
@@ -23,6 +25,6 @@ def create_collection(llm_provider: LLMProvider, collection_name: str) -> JSONRe
         JSONResponse: Success Message.
 
     """
-    service = LLMContext(LLMStrategyFactory.get_strategy(strategy_type=llm_provider, token="", collection_name=collection_name))
-    service.createe_collection_collection(name=collection_name)
+    # the strategies connect to an existing collection, so the new collection is created directly
+    await asyncio.to_thread(generate_collection, collection_name=collection_name, embeddings_size=get_embeddings_size(llm_provider=llm_provider))
     return JSONResponse(content={"message": f"Collection {collection_name} created."})
@@ -1,18 +1,62 @@
 """Route to handle the delection of a vector from the database."""
 
+import asyncio
+
 from fastapi import APIRouter
 from loguru import logger
+from omegaconf import DictConfig
 from qdrant_client import models
 from qdrant_client.http.models.models import UpdateResult
+from ultra_simple_config import load_config
 
 from agent.data_model.request_data_model import LLMProvider
+from agent.utils.semantic_cache import load_semantic_cache
 from agent.utils.vdb import load_vec_db_conn
 
 router = APIRouter()
 
 
+@load_config("config/main.yml")
+def _load_provider_collections(cfg: DictConfig) -> dict[LLMProvider, str]:
+    """Map every LLM provider to its collection, as configured for embedding and searching."""
+    return {
+        LLMProvider.OPENAI: cfg.qdrant.collection_name_openai,
+        LLMProvider.COHERE: cfg.qdrant.collection_name_cohere,
+        LLMProvider.OLLAMA: cfg.qdrant.collection_name_ollama,
+    }
+
+
+_PROVIDER_COLLECTION = _load_provider_collections()
+
+
+# the skeleton of the delete filter, only the matched values change between calls
+_DELETE_FILTER_KEYS = ("metadata.page", "metadata.source")
+
+
+def _make_delete_filter(page: int, source: str) -> models.Filter:
+    """Build the filter that selects all points of a page in a document.
+
+    Args:
+    ----
+        page (int): Number of the page in the document
+        source (str): Name of the Document
+
+    Returns:
+    -------
+        models.Filter: Filter on the page and source metadata.
+
+    """
+    page_key, source_key = _DELETE_FILTER_KEYS
+    return models.Filter(
+        must=[
+            models.FieldCondition(key=page_key, match=models.MatchValue(value=page)),
+            models.FieldCondition(key=source_key, match=models.MatchValue(value=source)),
+        ]
+    )
+
+
 @router.delete("/delete/{llm_provider}/{page}/{source}", tags=["embeddings"])
-def delete(page: int, source: str, llm_provider: LLMProvider = LLMProvider.OPENAI) -> UpdateResult:
+async def delete(page: int, source: str, llm_provider: LLMProvider = LLMProvider.OPENAI) -> UpdateResult:
     """Delete a vector from the database.
 
     Args:
@@ -31,26 +75,18 @@ def delete(page: int, source: str, llm_provider: LLMProvider = LLMProvider.OPENA
 
     """
     logger.info("Deleting Vector from Database")
-    if llm_provider == LLMProvider.ALEPH_ALPHA:
-        collection = "aleph-alpha"
-    elif llm_provider == LLMProvider.OPENAI:
-        collection = "openai"
-    elif llm_provider == LLMProvider.GPT4ALL:
-        collection = "gpt4all"
-    else:
+    try:
+        collection = _PROVIDER_COLLECTION[llm_provider]
+    except KeyError as e:
         msg = f"Unsupported LLM provider: {llm_provider}"
-        raise ValueError(msg)
+        raise ValueError(msg) from e
     qdrant_client, _ = load_vec_db_conn()
-    result = qdrant_client.delete(
+    result = await asyncio.to_thread(
+        qdrant_client.delete,
         collection_name=collection,
-        points_selector=models.FilterSelector(
-            filter=models.Filter(
-                must=[
-                    models.FieldCondition(key="metadata.page", match=models.MatchValue(value=page)),
-                    models.FieldCondition(key="metadata.source", match=models.MatchValue(value=source)),
-                ],
-            )
-        ),
+        points_selector=models.FilterSelector(filter=_make_delete_filter(page, source)),
     )
+    # cached search results may still contain the deleted points
+    await asyncio.to_thread(load_semantic_cache().invalidate, collection)
     logger.info("Deleted Point from Database via Metadata.")
     return result
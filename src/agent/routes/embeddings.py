@@ -1,70 +1,155 @@
 """Routes to manage embeddings."""
 
 import asyncio
+import hashlib
 from pathlib import Path
 
-from fastapi import APIRouter, File, UploadFile
+import aiofiles
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
 from loguru import logger
 
-from agent.backend.LLMStrategy import LLMContext, LLMStrategyFactory
-from agent.data_model.request_data_model import EmbeddTextRequest, LLMBackend, LLMProvider
+from agent.backend.LLMStrategy import LLMContext, get_service
+from agent.data_model.request_data_model import EmbeddTextBatchRequest, EmbeddTextRequest, LLMBackend
 from agent.data_model.response_data_model import EmbeddingResponse
+from agent.utils.semantic_cache import load_semantic_cache
 from agent.utils.utility import create_tmp_folder
+from agent.utils.vdb import relink_embedded_file
 
 router = APIRouter()
 
+# cached search results do not contain documents that were embedded after them
+search_cache = load_semantic_cache()
+
+# uploads are copied to disk in chunks of this size, so large files are never fully loaded into memory
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def get_form_service(llm_backend: LLMBackend = Depends(LLMBackend.as_form)) -> LLMContext:
+    """Get the LLM Context for a multipart request, where the LLM backend can not be sent as a JSON body."""
+    return get_service(llm_backend)
+
+
+async def _save(file: UploadFile, tmp_dir: str) -> str:
+    """Stream an uploaded file to the temporary folder without blocking the event loop.
+
+    Args:
+    ----
+        file (UploadFile): The uploaded file.
+        tmp_dir (str): The temporary folder.
+
+    Returns:
+    -------
+        str: The hash of the file content.
+
+    """
+    content_hash = hashlib.blake2b()
+    async with aiofiles.open(Path(tmp_dir) / file.filename, "wb") as f:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            content_hash.update(chunk)
+            await f.write(chunk)
+    return content_hash.hexdigest()
+
+
+async def _write_text(embedding: EmbeddTextRequest, tmp_dir: str) -> None:
+    """Write a text to a file in the temporary folder.
+
+    Args:
+    ----
+        embedding (EmbeddTextRequest): The text and its file name.
+        tmp_dir (str): The temporary folder.
+
+    """
+    async with aiofiles.open(Path(tmp_dir) / (embedding.file_name + ".txt"), "w") as f:
+        await f.write(embedding.text)
+
 
 @router.post("/documents", tags=["embeddings"])
-async def post_embed_documents(llm_backend: LLMBackend, files: list[UploadFile] = File(...), file_ending: str = ".pdf") -> EmbeddingResponse:
+async def post_embed_documents(files: list[UploadFile] = File(...), file_ending: str = ".pdf", service: LLMContext = Depends(get_form_service)) -> EmbeddingResponse:
     """Embeds multiple documents from files.
 
     Args:
     ----
-        llm_backend (LLMBackend): Which LLM backend to use.
         files (list[UploadFile], optional): The uploaded files. Defaults to File(...).
         file_ending (str, optional): The file ending of the uploaded file. Defaults to ".pdf".
+        service (LLMContext, optional): The LLM backend to embed with. Defaults to Depends(get_form_service).
 
     Raises:
     ------
-        ValueError: If a temporary folder to save the files is not provided.
-        ValueError: If a file is not provided to save.
+        HTTPException: If a file name is missing, contains a path or is uploaded more than once.
 
     Returns:
     -------
-        EmbeddingResponse: Response containing the status and a list of file names.
+        EmbeddingResponse: Response containing the status, a list of file names, the files that were skipped as duplicates
+            and the previous names of files that were already embedded.
 
     """
     logger.info("Embedding Multiple Documents")
-    tmp_dir = create_tmp_folder()
+    file_names = [file.filename for file in files]
+    # the files are saved concurrently into one folder, so every name has to be a plain and unique file name
+    if not all(file_names):
+        raise HTTPException(status_code=422, detail="Please provide a file to save.")
+    if any(Path(file_name).name != file_name for file_name in file_names):
+        raise HTTPException(status_code=422, detail="File names must not contain a path.")
+    if len(set(file_names)) != len(file_names):
+        raise HTTPException(status_code=422, detail="File names must be unique.")
 
-    service = LLMContext(LLMStrategyFactory.get_strategy(strategy_type=LLMProvider.ALEPH_ALPHA, collection_name=llm_backend.collection_name))
-    file_names = []
-
-    # Use asyncio to write files concurrently
-    write_tasks = []
-    for file in files:
-        file_name = file.filename
-        if not file_name:
-            msg = "Please provide a file to save."
-            raise ValueError(msg)
-
-        file_path = Path(tmp_dir) / file_name
-        write_tasks.append(asyncio.to_thread(file.save, file_path))
-        file_names.append(file_name)
-
-    await asyncio.gather(*write_tasks)
+    tmp_dir = create_tmp_folder()
 
-    service.embed_documents(folder=tmp_dir, file_ending=file_ending)
-    return EmbeddingResponse(status="success", files=file_names)
+    # read and write the files concurrently
+    saved_hashes = await asyncio.gather(*(_save(file, tmp_dir) for file in files))
+
+    # files of the request with the same content are only embedded once, under the first file name
+    unique_files = {}
+    duplicates = {}
+    for file_name, content_hash in zip(file_names, saved_hashes, strict=True):
+        if content_hash in unique_files:
+            duplicates[file_name] = unique_files[content_hash]
+            (Path(tmp_dir) / file_name).unlink()
+        else:
+            unique_files[content_hash] = file_name
+
+    # files with the same content were already embedded and only need to be linked to the new name
+    previous_names = await asyncio.gather(
+        *(asyncio.to_thread(relink_embedded_file, service.llm.collection_name, content_hash, file_name) for content_hash, file_name in unique_files.items())
+    )
+    content_hashes = {}
+    replaced = {}
+    for (content_hash, file_name), previous_name in zip(unique_files.items(), previous_names, strict=True):
+        if previous_name is None:
+            content_hashes[file_name] = content_hash
+        else:
+            (Path(tmp_dir) / file_name).unlink()
+            if previous_name != file_name:
+                replaced[file_name] = previous_name
+
+    # all files are in one folder, so every chunk is embedded in a single batched call
+    if content_hashes:
+        await asyncio.to_thread(service.embed_documents, directory=tmp_dir, file_ending=file_ending, content_hashes=content_hashes)
+    await asyncio.to_thread(search_cache.invalidate, service.llm.collection_name)
+    return EmbeddingResponse(status="success", files=list(unique_files.values()), duplicates=duplicates, replaced=replaced)
 
 
 @router.post("/string/", tags=["embeddings"])
-async def embedd_text(embedding: EmbeddTextRequest, llm_backend: LLMBackend) -> EmbeddingResponse:
+async def embedd_text(embedding: EmbeddTextRequest, service: LLMContext = Depends(get_service)) -> EmbeddingResponse:
     """Embedding text."""
     logger.info("Embedding Text")
-    service = LLMContext(LLMStrategyFactory.get_strategy(strategy_type=llm_backend.llm_provider, collection_name=llm_backend.collection_name))
     tmp_dir = create_tmp_folder()
-    with (Path(tmp_dir) / (embedding.file_name + ".txt")).open("w") as f:
-        f.write(embedding.text)
-    service.embed_documents(directory=tmp_dir, file_ending=".txt")
+    await _write_text(embedding, tmp_dir)
+    await asyncio.to_thread(service.embed_documents, directory=tmp_dir, file_ending=".txt")
+    await asyncio.to_thread(search_cache.invalidate, service.llm.collection_name)
     return EmbeddingResponse(status="success", files=[embedding.file_name])
+
+
+@router.post("/batch", tags=["embeddings"])
+async def embedd_text_batch(batch: EmbeddTextBatchRequest, service: LLMContext = Depends(get_service)) -> EmbeddingResponse:
+    """Embedding multiple texts with batched embedding requests."""
+    logger.info("Embedding {} Texts", len(batch.texts))
+    # every text is written to <file_name>.txt in one folder, so a repeated name would overwrite another text
+    if len({embedding.file_name for embedding in batch.texts}) != len(batch.texts):
+        raise HTTPException(status_code=422, detail="File names must be unique.")
+    tmp_dir = create_tmp_folder()
+    await asyncio.gather(*(_write_text(embedding, tmp_dir) for embedding in batch.texts))
+    # all texts are in one folder, so they are embedded together instead of one request per text
+    await asyncio.to_thread(service.embed_documents, directory=tmp_dir, file_ending=".txt")
+    await asyncio.to_thread(search_cache.invalidate, service.llm.collection_name)
+    return EmbeddingResponse(status="success", files=[embedding.file_name for embedding in batch.texts])
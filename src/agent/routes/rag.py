@@ -1,28 +1,46 @@
 """The RAG Routes."""
 
+import asyncio
 import json
 from collections.abc import AsyncGenerator
 
 from fastapi import APIRouter
 from fastapi.responses import StreamingResponse
 
-from agent.backend.graph import build_graph
+from agent.backend.graph import RETRIEVER_COLLECTION, build_graph, get_embedding
 from agent.data_model.request_data_model import LLMBackend, RAGRequest
 from agent.data_model.response_data_model import QAResponse
+from agent.utils.semantic_cache import load_semantic_cache, make_namespace
 
 graph = build_graph()
+rag_cache = load_semantic_cache()
 
 router = APIRouter()
 
 
 @router.post("/", tags=["rag"])
-def question_answer(rag: RAGRequest, llm_backend: LLMBackend) -> QAResponse:
+async def question_answer(rag: RAGRequest, llm_backend: LLMBackend) -> QAResponse:
     """Answering the Question."""
     messages = [dict(m) for m in rag.messages]
-    chain_result = graph.with_config(configurable={"model_name": llm_backend.llm_provider}).invoke({"retriever_name": llm_backend.llm_provider, "messages": messages})
+
+    # answers that depend on a chat history are not cached
+    cacheable = len(messages) == 1
+    embedding = None
+    if cacheable:
+        namespace = make_namespace("rag", llm_backend.llm_provider)
+        embedding = await get_embedding().aembed_query(messages[0]["content"])
+        if (cached := await asyncio.to_thread(rag_cache.lookup, RETRIEVER_COLLECTION, namespace, embedding)) is not None:
+            return QAResponse.model_validate(cached)
+
+    chain_result = await graph.with_config(configurable={"model_name": llm_backend.llm_provider}).ainvoke(
+        {"retriever_name": llm_backend.llm_provider, "messages": messages, "embedding": embedding}
+    )
 
     documents = [{"document": [doc.page_content], "metadata": [doc.metadata]} for doc in chain_result["documents"]]
-    return QAResponse(answer=chain_result["messages"][-1].content, meta_data=documents)
+    response = QAResponse(answer=chain_result["messages"][-1].content, meta_data=documents)
+    if cacheable:
+        await asyncio.to_thread(rag_cache.update, RETRIEVER_COLLECTION, namespace, embedding, response)
+    return response
 
 
 @router.post("/stream", tags=["rag"])
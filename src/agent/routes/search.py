@@ -1,26 +1,81 @@
 """The search routes."""
 
-from fastapi import APIRouter
+import asyncio
+import time
+
+from fastapi import APIRouter, Depends
 from fastapi.responses import JSONResponse
 from loguru import logger
 
-from agent.backend.LLMStrategy import LLMContext, LLMStrategyFactory
-from agent.data_model.request_data_model import LLMBackend, SearchParams
-from agent.data_model.response_data_model import SearchResponse
+from agent.backend.LLMStrategy import LLMContext, get_service
+from agent.data_model.request_data_model import LLMBackend, SearchBatchRequest, SearchParams
+from agent.data_model.response_data_model import SearchBatchResponse, SearchResponse
+from agent.utils.semantic_cache import load_semantic_cache, make_namespace
 
 router = APIRouter()
 
+search_cache = load_semantic_cache()
+
+
+async def _search(service: LLMContext, llm_backend: LLMBackend, search: SearchParams, embedding: list[float] | None = None) -> list[SearchResponse]:
+    """Search for documents, answering repeated queries from the semantic cache.
+
+    Args:
+    ----
+        service (LLMContext): The LLM backend to search with.
+        llm_backend (LLMBackend): The requested LLM backend.
+        search (SearchParams): The search parameters.
+        embedding (list[float] | None): Embedding of the query, if it was already embedded.
+
+    Returns:
+    -------
+        list[SearchResponse]: The found documents.
+
+    """
+    # only return cached results for the same collection and search parameters
+    collection = service.llm.collection_name
+    namespace = make_namespace(llm_backend.llm_provider, search.k, search.score_threshold, search.filter)
+    if embedding is None:
+        embedding = await asyncio.to_thread(service.embed_query, search.query)
+    if (cached := await asyncio.to_thread(search_cache.lookup, collection, namespace, embedding)) is not None:
+        return [SearchResponse.model_validate(result) for result in cached]
+
+    # reuse the embedding of the cache lookup, so the query is embedded only once
+    docs = await service.search(search=search, embedding=embedding).ainvoke(search.query)
+
+    logger.info("Found {} documents.", len(docs))
+    # chunks of text files have no page
+    response = [SearchResponse(text=doc.page_content, page=doc.metadata.get("page"), source=doc.metadata["source"], score=doc.metadata["score"]) for doc in docs]
+    if response:
+        await asyncio.to_thread(search_cache.update, collection, namespace, embedding, response)
+    return response
+
 
 @router.post("/search", tags=["search"])
-def search(search: SearchParams, llm_backend: LLMBackend) -> list[SearchResponse]:
+async def search(search: SearchParams, llm_backend: LLMBackend, service: LLMContext = Depends(get_service)) -> list[SearchResponse]:
     """Search for documents."""
     logger.info("Searching for Documents")
-    service = LLMContext(LLMStrategyFactory.get_strategy(strategy_type=llm_backend.llm_provider, token=llm_backend.token, collection_name=llm_backend.collection_name))
-    docs = service.search(search=search)
 
-    if not docs:
+    response = await _search(service, llm_backend, search)
+
+    if not response:
         logger.info("No Documents found.")
         return JSONResponse(content={"message": "No documents found."})
 
-    logger.info(f"Found {len(docs)} documents.")
-    return [SearchResponse(text=d[0].page_content, page=d[0].metadata["page"], source=d[0].metadata["source"], score=d[1]) for d in docs]
+    return response
+
+
+@router.post("/search/batch", tags=["search"])
+async def search_batch(batch: SearchBatchRequest, llm_backend: LLMBackend, service: LLMContext = Depends(get_service)) -> list[SearchBatchResponse]:
+    """Run multiple searches concurrently."""
+    logger.info("Searching for Documents with {} queries", len(batch.searches))
+
+    # all queries are embedded in one request and reused for the cache lookup and the dense search
+    embeddings = await asyncio.to_thread(service.embed_queries, [search.query for search in batch.searches])
+
+    async def timed_search(search: SearchParams, embedding: list[float]) -> SearchBatchResponse:
+        start = time.perf_counter()
+        results = await _search(service, llm_backend, search, embedding=embedding)
+        return SearchBatchResponse(results=results, latency_ms=(time.perf_counter() - start) * 1000)
+
+    return await asyncio.gather(*(timed_search(search, embedding) for search, embedding in zip(batch.searches, embeddings, strict=True)))
@@ -0,0 +1,216 @@
+"""Semantic Cache for repeated or paraphrased queries."""
+
+import json
+import time
+import uuid
+from functools import lru_cache
+from typing import Any
+
+import grpc
+from loguru import logger
+from omegaconf import DictConfig
+from pydantic_core import to_jsonable_python
+from qdrant_client import QdrantClient, models
+from qdrant_client.http.exceptions import UnexpectedResponse
+from ultra_simple_config import load_config
+
+from agent.utils.vdb import load_vec_db_conn
+
+
+def make_namespace(*params: Any) -> str:  # noqa: ANN401
+    """Build the namespace of a query from the parameters its response depends on.
+
+    Args:
+    ----
+        params (Any): JSON serializable parameters, e.g. the provider and the search parameters.
+
+    Returns:
+    -------
+        str: The namespace.
+
+    """
+    return json.dumps(params, sort_keys=True)
+
+
+def _vector_name(size: int) -> str:
+    """Name of the vector for embeddings of the given size, so providers with different embedding sizes share the collection."""
+    return f"size_{size}"
+
+
+class SemanticCache:
+    """Cache that returns stored responses for semantically similar queries.
+
+    The entries are stored in a Qdrant collection, so all workers share them and an invalidation is seen by every worker.
+    A response is only returned for a query that was asked against the same collection with the same namespace.
+    """
+
+    def __init__(self, client: QdrantClient, collection_name: str = "semantic_cache", threshold: float = 0.95, max_size: int = 10_000, ttl: float = 3600) -> None:
+        """Init the Semantic Cache.
+
+        Args:
+        ----
+            client (QdrantClient): Client of the Qdrant DB that stores the entries.
+            collection_name (str): Name of the Collection of the entries.
+            threshold (float): Minimum cosine similarity for a cache hit.
+            max_size (int): Maximum number of entries, the least recently used entries are evicted first.
+            ttl (float): Time to live of an entry in seconds.
+
+        """
+        self.client = client
+        self.collection_name = collection_name
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl = ttl
+
+    def __len__(self) -> int:
+        """Number of cached entries."""
+        return self.client.count(collection_name=self.collection_name, exact=True).count
+
+    def initialize(self, embeddings_sizes: list[int]) -> None:
+        """Create the collection of the entries, if it does not exist yet.
+
+        Args:
+        ----
+            embeddings_sizes (list[int]): Sizes of the embeddings that are cached.
+
+        """
+        if self.client.collection_exists(collection_name=self.collection_name):
+            logger.info("SUCCESS: Collection {} already exists.", self.collection_name)
+            return
+
+        try:
+            self.client.create_collection(
+                collection_name=self.collection_name,
+                vectors_config={_vector_name(size): models.VectorParams(size=size, distance=models.Distance.COSINE) for size in set(embeddings_sizes)},
+            )
+        except (UnexpectedResponse, grpc.RpcError):
+            # another worker may have created the collection between the check and the creation
+            if not self.client.collection_exists(collection_name=self.collection_name):
+                raise
+            return
+
+        # index the payload used to filter lookups, invalidations and the eviction
+        self.client.create_payload_index(collection_name=self.collection_name, field_name="collection", field_schema=models.PayloadSchemaType.KEYWORD)
+        self.client.create_payload_index(collection_name=self.collection_name, field_name="namespace", field_schema=models.PayloadSchemaType.KEYWORD)
+        self.client.create_payload_index(collection_name=self.collection_name, field_name="created", field_schema=models.PayloadSchemaType.FLOAT)
+        self.client.create_payload_index(collection_name=self.collection_name, field_name="used", field_schema=models.PayloadSchemaType.FLOAT)
+        logger.info("SUCCESS: Collection {} created.", self.collection_name)
+
+    def lookup(self, collection: str, namespace: str, embedding: list[float]) -> Any | None:  # noqa: ANN401
+        """Return the cached response for the most similar query.
+
+        Args:
+        ----
+            collection (str): The collection the response was retrieved from.
+            namespace (str): The namespace of the query.
+            embedding (list[float]): The embedding of the query.
+
+        Returns:
+        -------
+            Any | None: The cached response as JSON compatible data or None if there is no similar enough query.
+
+        """
+        now = time.time()
+        points = self.client.query_points(
+            collection_name=self.collection_name,
+            query=embedding,
+            using=_vector_name(len(embedding)),
+            query_filter=models.Filter(
+                must=[
+                    models.FieldCondition(key="collection", match=models.MatchValue(value=collection)),
+                    models.FieldCondition(key="namespace", match=models.MatchValue(value=namespace)),
+                    models.FieldCondition(key="created", range=models.Range(gt=now - self.ttl)),
+                ]
+            ),
+            limit=1,
+            score_threshold=self.threshold,
+            with_payload=["response"],
+        ).points
+        if not points:
+            return None
+
+        # mark the entry as used for the eviction, without waiting for the write
+        self.client.set_payload(collection_name=self.collection_name, payload={"used": now}, points=[points[0].id], wait=False)
+
+        logger.info("Semantic cache hit with score {:.3f}.", points[0].score)
+        return points[0].payload["response"]
+
+    def update(self, collection: str, namespace: str, embedding: list[float], response: Any) -> None:  # noqa: ANN401
+        """Store the response for a query.
+
+        Args:
+        ----
+            collection (str): The collection the response was retrieved from.
+            namespace (str): The namespace of the query.
+            embedding (list[float]): The embedding of the query.
+            response (Any): The response to cache, pydantic models are stored as JSON.
+
+        """
+        now = time.time()
+        self.client.upsert(
+            collection_name=self.collection_name,
+            points=[
+                models.PointStruct(
+                    id=str(uuid.uuid4()),
+                    vector={_vector_name(len(embedding)): embedding},
+                    payload={"collection": collection, "namespace": namespace, "created": now, "used": now, "response": to_jsonable_python(response)},
+                )
+            ],
+        )
+        self._evict(now)
+
+    def invalidate(self, collection: str) -> None:
+        """Drop all cached responses of a collection, e.g. after documents were added or deleted.
+
+        Args:
+        ----
+            collection (str): The collection that changed.
+
+        """
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=models.FilterSelector(filter=models.Filter(must=[models.FieldCondition(key="collection", match=models.MatchValue(value=collection))])),
+        )
+        logger.info("Invalidated the semantic cache of collection {}.", collection)
+
+    def _evict(self, now: float) -> None:
+        """Delete the expired entries and the least recently used entries above the maximum size."""
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=models.FilterSelector(filter=models.Filter(must=[models.FieldCondition(key="created", range=models.Range(lte=now - self.ttl))])),
+        )
+
+        overflow = self.client.count(collection_name=self.collection_name, exact=False).count - self.max_size
+        if overflow > 0:
+            points, _ = self.client.scroll(collection_name=self.collection_name, limit=overflow, order_by=models.OrderBy(key="used"), with_payload=False)
+            self.client.delete(collection_name=self.collection_name, points_selector=models.PointIdsList(points=[point.id for point in points]))
+
+
+@lru_cache(maxsize=1)
+@load_config("config/main.yml")
+def load_semantic_cache(cfg: DictConfig) -> SemanticCache:
+    """Load the Semantic Cache shared by all routes.
+
+    Args:
+    ----
+        cfg (DictConfig): Configuration with the 'collection_name', 'threshold', 'max_size' and 'ttl' fields under the 'semantic_cache' key.
+
+    Returns:
+    -------
+        SemanticCache: The configured cache.
+
+    """
+    qdrant_client, _ = load_vec_db_conn()
+    return SemanticCache(
+        qdrant_client,
+        collection_name=cfg.semantic_cache.collection_name,
+        threshold=cfg.semantic_cache.threshold,
+        max_size=cfg.semantic_cache.max_size,
+        ttl=cfg.semantic_cache.ttl,
+    )
+
+
+@load_config("config/main.yml")
+def initialize_semantic_cache(cfg: DictConfig) -> None:
+    """Create the collection of the Semantic Cache for the embedding sizes of all providers."""
+    load_semantic_cache().initialize([cfg.openai_embeddings.size, cfg.cohere_embeddings.size, cfg.ollama_embeddings.size])
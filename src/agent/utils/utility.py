@@ -32,22 +32,15 @@ def combine_text_from_list(input_list: list) -> str:
         str: Combined string
 
     """
-    # iterate through list and combine all strings to one
-    combined_text = ""
+    logger.debug("List: {}", input_list)
 
-    logger.info(f"List: {input_list}")
+    # verify that the list only contains strings
+    if not all(isinstance(text, str) for text in input_list):
+        msg = "Input list must contain only strings"
+        raise TypeError(msg)
 
-    for text in input_list:
-        # verify that text is a string
-        if isinstance(text, str):
-            # combine the text in a new line
-            combined_text += "\n".join(text)
-
-        else:
-            msg = "Input list must contain only strings"
-            raise TypeError(msg)
-
-    return combined_text
+    # combine the texts in one pass, each in a new line
+    return "\n".join(input_list)
 
 
 def load_prompt_template(prompt_name: str, task: str) -> PromptTemplate:
@@ -104,9 +97,9 @@ def create_tmp_folder() -> str:
     tmp_dir = Path.cwd() / f"tmp_{uuid.uuid4()}"
     try:
         tmp_dir.mkdir(parents=True, exist_ok=True)
-        logger.info(f"Created new folder {tmp_dir}.")
+        logger.info("Created new folder {}.", tmp_dir)
     except ValueError as e:
-        logger.error(f"Failed to create directory {tmp_dir}. Error: {e}")
+        logger.error("Failed to create directory {}. Error: {}", tmp_dir, e)
         raise
     return str(tmp_dir)
 
@@ -1,23 +1,43 @@
 """Vector Database Utilities."""
 
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
+import grpc
+from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 from langchain_qdrant import FastEmbedSparse, QdrantVectorStore, RetrievalMode
 from loguru import logger
 from omegaconf import DictConfig
 from qdrant_client import QdrantClient, models
+from qdrant_client.http.exceptions import UnexpectedResponse
 from ultra_simple_config import load_config
 
-sparse_embeddings = FastEmbedSparse(model_name="Qdrant/bm25")
+from agent.data_model.request_data_model import LLMProvider, SearchParams
 
+# the quantized vectors are oversampled and rescored with the original vectors to keep the recall
+QUANTIZATION_SEARCH_PARAMS = models.SearchParams(quantization=models.QuantizationSearchParams(rescore=True, oversampling=2.0))
 
-def init_vdb(cfg: DictConfig, collection_name: str, embedding: Embeddings) -> QdrantVectorStore:
+
+@lru_cache(maxsize=1)
+def get_sparse_embeddings() -> FastEmbedSparse:
+    """Get the bm25 sparse embedding model, loaded on first use instead of on import.
+
+    Returns
+    -------
+        FastEmbedSparse: The sparse embedding model.
+
+    """
+    return FastEmbedSparse(model_name="Qdrant/bm25")
+
+
+def init_vdb(collection_name: str, embedding: Embeddings) -> QdrantVectorStore:
     """Establish a connection to the Qdrant DB.
 
     Args:
     ----
-        cfg (DictConfig): the configuration from the file.
         collection_name (str): name of the collection in the Qdrant DB.
         embedding (Embeddings): Embedding Type.
 
@@ -26,15 +46,15 @@ def init_vdb(cfg: DictConfig, collection_name: str, embedding: Embeddings) -> Qd
         Qdrant: Established Connection to the Vector DB including Embeddings.
 
     """
-    qdrant_client = QdrantClient(cfg.qdrant.url, port=cfg.qdrant.port, api_key=os.getenv("QDRANT_API_KEY"), prefer_grpc=cfg.qdrant.prefer_grpc)
+    qdrant_client, _ = load_vec_db_conn()
 
-    logger.info(f"USING COLLECTION: {collection_name}")
+    logger.info("USING COLLECTION: {}", collection_name)
 
     vector_db = QdrantVectorStore(
         client=qdrant_client,
         collection_name=collection_name,
         embedding=embedding,
-        sparse_embedding=sparse_embeddings,
+        sparse_embedding=get_sparse_embeddings(),
         retrieval_mode=RetrievalMode.HYBRID,
         sparse_vector_name="fast-sparse-bm25",
     )
@@ -43,19 +63,106 @@ def init_vdb(cfg: DictConfig, collection_name: str, embedding: Embeddings) -> Qd
     return vector_db
 
 
+def add_texts_in_batches(vector_db: QdrantVectorStore, texts: list[str], metadatas: list[dict], batch_size: int, max_workers: int) -> None:
+    """Embed and upsert texts into the vector database in concurrent batches.
+
+    The texts are sorted by length first, so that every batch sent to the embedding model
+    contains chunks of similar size and as little padding as possible is wasted.
+
+    Args:
+    ----
+        vector_db (QdrantVectorStore): The vector database to add the texts to.
+        texts (list[str]): The texts to embed.
+        metadatas (list[dict]): The metadata for each text.
+        batch_size (int): Number of texts per embedding request.
+        max_workers (int): Maximum number of batches that are embedded at the same time.
+
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    batches = [order[i : i + batch_size] for i in range(0, len(order), batch_size)]
+
+    def add_batch(batch: list[int]) -> None:
+        vector_db.add_texts(texts=[texts[i] for i in batch], metadatas=[metadatas[i] for i in batch], batch_size=batch_size)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(batches)) or 1) as executor:
+        # consume the iterator so that exceptions in the workers are raised here
+        list(executor.map(add_batch, batches))
+
+    logger.info("Embedded {} texts in {} batches.", len(texts), len(batches))
+
+
+def hybrid_search_with_score(vector_db: QdrantVectorStore, query: str, search: SearchParams, embedding: list[float] | None = None) -> list[tuple[Document, float]]:
+    """Search the vector database with dense and sparse vectors, fused with RRF.
+
+    Same query as QdrantVectorStore.similarity_search_with_score in hybrid mode, but the dense embedding
+    of the query can be passed in, so that a query that was already embedded is not embedded again.
+
+    Args:
+    ----
+        vector_db (QdrantVectorStore): The vector database to search.
+        query (str): The query, used for the sparse embedding.
+        search (SearchParams): The amount of documents, the filter and the score threshold of the search.
+        embedding (list[float] | None): Dense embedding of the query, computed if not provided.
+
+    Returns:
+    -------
+        list[tuple[Document, float]]: The found documents and their scores.
+
+    """
+    if embedding is None:
+        embedding = vector_db.embeddings.embed_query(query)
+    # the bm25 sparse embedding is computed locally and cheap
+    sparse_embedding = vector_db.sparse_embeddings.embed_query(query)
+
+    points = vector_db.client.query_points(
+        collection_name=vector_db.collection_name,
+        prefetch=[
+            models.Prefetch(using=vector_db.vector_name, query=embedding, filter=search.filter, limit=search.k, params=QUANTIZATION_SEARCH_PARAMS),
+            models.Prefetch(
+                using=vector_db.sparse_vector_name,
+                query=models.SparseVector(indices=sparse_embedding.indices, values=sparse_embedding.values),
+                filter=search.filter,
+                limit=search.k,
+                params=QUANTIZATION_SEARCH_PARAMS,
+            ),
+        ],
+        query=models.FusionQuery(fusion=models.Fusion.RRF),
+        query_filter=search.filter,
+        search_params=QUANTIZATION_SEARCH_PARAMS,
+        limit=search.k,
+        with_payload=True,
+        with_vectors=False,
+        score_threshold=search.score_threshold,
+    ).points
+
+    return [
+        (
+            Document(
+                page_content=point.payload.get(vector_db.content_payload_key, ""),
+                metadata={**(point.payload.get(vector_db.metadata_payload_key) or {}), "_id": point.id, "_collection_name": vector_db.collection_name},
+            ),
+            point.score,
+        )
+        for point in points
+    ]
+
+
+@lru_cache(maxsize=1)
 @load_config("config/main.yml")
 def load_vec_db_conn(cfg: DictConfig) -> tuple[QdrantClient, DictConfig]:
     """Load the Vector Database Connection.
 
-    This function creates a new QdrantClient instance using the configuration
+    This function creates a QdrantClient instance using the configuration
     parameters provided in the 'cfg' argument. The QdrantClient is used to
-    interact with the Qdrant vector database.
+    interact with the Qdrant vector database. The client is created once and
+    shared by all callers, so its connection pool is reused between requests.
 
     Args:
     ----
         cfg (DictConfig): A configuration object that contains the settings
                           for the QdrantClient. It should have 'url', 'port',
-                          and 'prefer_grpc' fields under the 'qdrant' key.
+                          'grpc_port', 'prefer_grpc' and 'timeout' fields
+                          under the 'qdrant' key.
 
     Returns:
     -------
@@ -64,7 +171,52 @@ def load_vec_db_conn(cfg: DictConfig) -> tuple[QdrantClient, DictConfig]:
                                          original configuration object.
 
     """
-    return (QdrantClient(cfg.qdrant.url, port=cfg.qdrant.port, api_key=os.getenv("QDRANT_API_KEY"), prefer_grpc=cfg.qdrant.prefer_grpc), cfg)
+    qdrant_client = QdrantClient(
+        cfg.qdrant.url,
+        port=cfg.qdrant.port,
+        grpc_port=cfg.qdrant.grpc_port,
+        api_key=os.getenv("QDRANT_API_KEY"),
+        prefer_grpc=cfg.qdrant.prefer_grpc,
+        timeout=cfg.qdrant.timeout,
+    )
+    return (qdrant_client, cfg)
+
+
+def _content_hash_filter(content_hash: str) -> models.Filter:
+    """Filter for the points of a file with the given content hash."""
+    return models.Filter(must=[models.FieldCondition(key="metadata.content_hash", match=models.MatchValue(value=content_hash))])
+
+
+def relink_embedded_file(collection_name: str, content_hash: str, source: str) -> str | None:
+    """Point already embedded chunks of a file to a new file name.
+
+    A chunk has a single source, so the previous file name is replaced: searches return the new name
+    and the chunks can only be deleted by the new name afterwards.
+
+    Args:
+    ----
+        collection_name (str): Name of the Collection
+        content_hash (str): Hash of the file content.
+        source (str): The new file name.
+
+    Returns:
+    -------
+        str | None: The previous file name if the file was already embedded, None otherwise.
+
+    """
+    qdrant_client, _ = load_vec_db_conn()
+
+    points, _ = qdrant_client.scroll(
+        collection_name=collection_name, scroll_filter=_content_hash_filter(content_hash), limit=1, with_payload=["metadata"], with_vectors=False
+    )
+    if not points:
+        return None
+
+    previous_source = points[0].payload["metadata"]["source"]
+    if previous_source != source:
+        qdrant_client.set_payload(collection_name=collection_name, payload={"source": source}, key="metadata", points=_content_hash_filter(content_hash))
+    logger.info("SUCCESS: {} is already embedded as {}, linked the existing points.", source, previous_source)
+    return previous_source
 
 
 def initialize_vector_db(collection_name: str, embeddings_size: int) -> None:
@@ -79,9 +231,33 @@ def initialize_vector_db(collection_name: str, embeddings_size: int) -> None:
     qdrant_client, _ = load_vec_db_conn()
 
     if qdrant_client.collection_exists(collection_name=collection_name):
-        logger.info(f"SUCCESS: Collection {collection_name} already exists.")
-    else:
+        logger.info("SUCCESS: Collection {} already exists.", collection_name)
+        return
+
+    try:
         generate_collection(collection_name=collection_name, embeddings_size=embeddings_size)
+    except (UnexpectedResponse, grpc.RpcError):
+        # another worker or replica may have created the collection between the check and the creation
+        if not qdrant_client.collection_exists(collection_name=collection_name):
+            raise
+        logger.info("SUCCESS: Collection {} was created concurrently.", collection_name)
+
+
+@load_config("config/main.yml")
+def get_embeddings_size(cfg: DictConfig, llm_provider: LLMProvider) -> int:
+    """Get the size of the embeddings of a LLM provider.
+
+    Args:
+    ----
+        cfg (DictConfig): Configuration with the 'size' field under the '<provider>_embeddings' keys.
+        llm_provider (LLMProvider): The LLM provider.
+
+    Returns:
+    -------
+        int: Size of the Embeddings
+
+    """
+    return cfg[f"{llm_provider.value}_embeddings"].size
 
 
 def generate_collection(collection_name: str, embeddings_size: int) -> None:
@@ -98,15 +274,22 @@ def generate_collection(collection_name: str, embeddings_size: int) -> None:
     qdrant_client.set_sparse_model("Qdrant/bm25")
     qdrant_client.create_collection(
         collection_name=collection_name,
-        vectors_config=models.VectorParams(size=embeddings_size, distance=models.Distance.COSINE),
+        vectors_config=models.VectorParams(size=embeddings_size, distance=models.Distance.COSINE, on_disk=True),
         sparse_vectors_config=qdrant_client.get_fastembed_sparse_vector_params(),
+        quantization_config=models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(type=models.ScalarType.INT8, always_ram=True)),
     )
-    logger.info(f"SUCCESS: Collection {collection_name} created.")
+    # index the metadata used to filter searches and deletions
+    qdrant_client.create_payload_index(collection_name=collection_name, field_name="metadata.page", field_schema=models.PayloadSchemaType.INTEGER)
+    qdrant_client.create_payload_index(collection_name=collection_name, field_name="metadata.source", field_schema=models.PayloadSchemaType.KEYWORD)
+    qdrant_client.create_payload_index(collection_name=collection_name, field_name="metadata.content_hash", field_schema=models.PayloadSchemaType.KEYWORD)
+    logger.info("SUCCESS: Collection {} created.", collection_name)
 
 
 @load_config("config/main.yml")
-def initialize_all_vector_dbs(cfg: DictConfig) -> None:
-    """Initializes all vector dbs."""
-    initialize_vector_db(cfg.qdrant.collection_name_openai, cfg.openai_embeddings.size)
-    initialize_vector_db(cfg.qdrant.collection_name_cohere, cfg.cohere_embeddings.size)
-    initialize_vector_db(cfg.qdrant.collection_name_ollama, cfg.ollama_embeddings.size)
+async def initialize_all_vector_dbs(cfg: DictConfig) -> None:
+    """Initializes all vector dbs concurrently."""
+    await asyncio.gather(
+        asyncio.to_thread(initialize_vector_db, cfg.qdrant.collection_name_openai, cfg.openai_embeddings.size),
+        asyncio.to_thread(initialize_vector_db, cfg.qdrant.collection_name_cohere, cfg.cohere_embeddings.size),
+        asyncio.to_thread(initialize_vector_db, cfg.qdrant.collection_name_ollama, cfg.ollama_embeddings.size),
+    )
@@ -0,0 +1,84 @@
+"""Tests for the semantic cache."""
+import pytest
+from qdrant_client import QdrantClient
+
+from agent.utils.semantic_cache import SemanticCache, make_namespace
+
+
+def make_cache(**kwargs: float) -> SemanticCache:
+    """Create a cache in an in-memory Qdrant DB."""
+    cache = SemanticCache(QdrantClient(":memory:"), **kwargs)
+    cache.initialize([2, 3])
+    return cache
+
+
+@pytest.fixture()
+def cache() -> SemanticCache:
+    """Cache with the default settings."""
+    return make_cache()
+
+
+def test_lookup_returns_response_for_similar_query(cache: SemanticCache) -> None:
+    """Test that a similar enough query hits the cache."""
+    cache.update("openai", "search", [1.0, 0.0], "answer")
+
+    assert cache.lookup("openai", "search", [0.99, 0.01]) == "answer"
+    assert cache.lookup("openai", "search", [0.0, 1.0]) is None
+
+
+def test_lookup_is_separated_by_namespace(cache: SemanticCache) -> None:
+    """Test that responses are only returned for the same collection and namespace."""
+    cache.update("openai", make_namespace(4), [1.0, 0.0], "answer")
+
+    assert cache.lookup("cohere", make_namespace(4), [1.0, 0.0]) is None
+    assert cache.lookup("openai", make_namespace(3), [1.0, 0.0]) is None
+
+
+def test_embeddings_of_different_sizes_are_stored(cache: SemanticCache) -> None:
+    """Test that providers with different embedding sizes share the cache."""
+    cache.update("openai", "search", [1.0, 0.0], "small")
+    cache.update("openai", "search", [1.0, 0.0, 0.0], "large")
+
+    assert cache.lookup("openai", "search", [1.0, 0.0]) == "small"
+    assert cache.lookup("openai", "search", [1.0, 0.0, 0.0]) == "large"
+
+
+def test_least_recently_used_entry_is_evicted() -> None:
+    """Test that the cache does not grow beyond its maximum size."""
+    cache = make_cache(max_size=2)
+    cache.update("openai", "search", [1.0, 0.0], "first")
+    cache.update("openai", "search", [0.0, 1.0], "second")
+    cache.lookup("openai", "search", [1.0, 0.0])
+    cache.update("cohere", "search", [1.0, 0.0], "third")
+
+    assert len(cache) == 2
+    assert cache.lookup("openai", "search", [1.0, 0.0]) == "first"
+    assert cache.lookup("openai", "search", [0.0, 1.0]) is None
+
+
+def test_expired_entry_is_not_returned() -> None:
+    """Test that entries are dropped after their time to live."""
+    cache = make_cache(ttl=0)
+    cache.update("openai", "search", [1.0, 0.0], "answer")
+
+    assert cache.lookup("openai", "search", [1.0, 0.0]) is None
+
+
+def test_invalidate_drops_entries_of_collection(cache: SemanticCache) -> None:
+    """Test that invalidating a collection only drops its own entries."""
+    cache.update("openai", "search", [1.0, 0.0], "answer")
+    cache.update("cohere", "search", [1.0, 0.0], "other")
+    cache.invalidate("openai")
+
+    assert cache.lookup("openai", "search", [1.0, 0.0]) is None
+    assert cache.lookup("cohere", "search", [1.0, 0.0]) == "other"
+    assert len(cache) == 1
+
+
+def test_pydantic_responses_are_stored_as_json(cache: SemanticCache) -> None:
+    """Test that models are stored in a form every worker can read."""
+    from agent.data_model.response_data_model import SearchResponse
+
+    cache.update("openai", "search", [1.0, 0.0], [SearchResponse(text="text", page=None, source="a.txt", score=0.5)])
+
+    assert cache.lookup("openai", "search", [1.0, 0.0]) == [{"text": "text", "page": None, "source": "a.txt", "score": 0.5}]